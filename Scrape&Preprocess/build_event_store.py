@@ -0,0 +1,98 @@
+"""Convert the preprocessed season event CSVs into a partitioned Parquet store.
+
+Run after Preprocess Data.ipynb, from the repository root:
+
+    python "Scrape&Preprocess/build_event_store.py"
+    python "Scrape&Preprocess/build_event_store.py" --season 2023-2024 --by-match
+
+Each season is written to data/events/season=<season>/ (and optionally one
+match_id=<n>/ directory per match), replaced atomically on rebuild (see
+partitions.py). Text columns are dictionary encoded and coordinates are stored
+as float32; the dashboard reads only the columns it needs, memory mapped.
+"""
+import argparse
+import glob
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from partitions import replace_partition
+
+CSV_PATTERN = 'Manchester United Events * Preprocessed.csv'
+SEASON_RE = re.compile(r'Manchester United Events (\d{4}-\d{4}) Preprocessed\.csv$')
+
+# Event-level columns kept in the store. The flattened qualifier columns are
+# left out, they are mostly empty and none of the maps read them.
+STORE_COLUMNS = ['id', 'event_id', 'match_id', 'minute', 'second', 'team_id', 'player_id', 'player_name',
+                 'period_value', 'period_display_name', 'type_value', 'type_display_name',
+                 'outcome_type_value', 'outcome_type_display_name', 'x', 'y', 'end_x', 'end_y',
+                 'is_touch', 'is_shot', 'is_goal', 'pass_recipient_name', 'pass_recipient_id']
+CATEGORICAL_COLUMNS = ['player_name', 'period_display_name', 'type_display_name',
+                       'outcome_type_display_name', 'pass_recipient_name']
+FLOAT32_COLUMNS = ['x', 'y', 'end_x', 'end_y']
+
+
+def discover_seasons(data_dir):
+    seasons = {}
+    for path in glob.glob(os.path.join(data_dir, CSV_PATTERN)):
+        match = SEASON_RE.search(os.path.basename(path))
+        if match:
+            seasons[match.group(1)] = path
+    return dict(sorted(seasons.items()))
+
+
+def to_store_frame(events):
+    events = events[[column for column in STORE_COLUMNS if column in events.columns]].copy()
+    for column in CATEGORICAL_COLUMNS:
+        if column in events.columns:
+            events[column] = events[column].astype('category')
+    for column in FLOAT32_COLUMNS:
+        if column in events.columns:
+            events[column] = events[column].astype('float32')
+    for column in ['is_touch', 'is_shot', 'is_goal']:
+        if column in events.columns:
+            events[column] = events[column].fillna(False).astype(bool)
+    return events
+
+
+def write_season(events, store_dir, season, by_match=False):
+    table = pa.Table.from_pandas(to_store_frame(events), preserve_index=False)
+
+    def write(directory):
+        if by_match:
+            pq.write_to_dataset(table, directory, partition_cols=['match_id'])
+        else:
+            os.makedirs(directory)
+            pq.write_table(table, os.path.join(directory, 'part-0.parquet'))
+
+    # Swapped in whole so a running dashboard never sees a missing or half-written season
+    return replace_partition(os.path.join(store_dir, f'season={season}'), write)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the columnar event store from the preprocessed CSVs.')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--store-dir', default=None, help='defaults to <data-dir>/events')
+    parser.add_argument('--season', action='append', help='season to convert, e.g. 2023-2024 (default: all)')
+    parser.add_argument('--by-match', action='store_true', help='also partition each season by match_id')
+    args = parser.parse_args()
+
+    store_dir = args.store_dir or os.path.join(args.data_dir, 'events')
+    seasons = discover_seasons(args.data_dir)
+    if args.season:
+        missing = set(args.season) - set(seasons)
+        if missing:
+            parser.error(f'no preprocessed CSV for season(s): {", ".join(sorted(missing))}')
+        seasons = {season: seasons[season] for season in args.season}
+
+    for season, path in seasons.items():
+        events = pd.read_csv(path, usecols=lambda column: column in STORE_COLUMNS, low_memory=False)
+        season_dir = write_season(events, store_dir, season, by_match=args.by_match)
+        print(f'{season}: {len(events)} events -> {season_dir}')
+
+
+if __name__ == '__main__':
+    main()
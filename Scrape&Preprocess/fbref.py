@@ -0,0 +1,281 @@
+"""Fetch fbref player stat tables for whole leagues into a Parquet store.
+
+Replaces get_tables/get_outfield_data in Analysis/radar_chart_cb_mu.ipynb. Run
+from the repository root:
+
+    python "Scrape&Preprocess/fbref.py"
+    python "Scrape&Preprocess/fbref.py" --league "Premier League" --season 2023-2024 --keepers
+
+Every stat page (standard, shooting, passing, ...) of every league is fetched
+by a small thread pool over one pooled HTTP session. Responses are cached on
+disk with their ETag and Last-Modified headers: within --ttl hours a page is
+not requested at all, after that it is revalidated with a conditional request
+and only downloaded again if it changed. Requests are spaced --interval seconds
+apart across all threads, so the pool overlaps downloads and parsing without
+going over fbref's rate limit. Only the player table's <tbody> is cut out of
+each page and parsed with lxml, instead of the whole document.
+
+The categories of a league are joined column-wise, as the notebook did, and
+written to <store-dir>/league=<league>/season=<season>/, swapped in whole
+(see partitions.py).
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
+from lxml import html as lxml_html
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from partitions import replace_partition
+
+BASE_URL = 'https://fbref.com/en'
+
+# League name: (fbref competition id, URL slug)
+LEAGUES = {'Serie A': ('11', 'Serie-A-Stats'),
+           'La Liga': ('12', 'La-Liga-Stats'),
+           'Ligue 1': ('13', 'Ligue-1-Stats'),
+           'Bundesliga': ('20', 'Bundesliga-Stats'),
+           'Premier League': ('9', 'Premier-League-Stats'),
+           'Big 5': ('Big5', 'Big-5-European-Leagues-Stats')}
+BIG_5 = ['Serie A', 'La Liga', 'Ligue 1', 'Bundesliga', 'Premier League']
+
+OUTFIELD_CATEGORIES = ['stats', 'shooting', 'passing', 'passing_types', 'gca', 'defense', 'possession', 'misc']
+KEEPER_CATEGORIES = ['keepers', 'keepersadv']
+
+# Stat pages hold the squad table first and the player table second
+PLAYER_TABLE = 1
+
+# data-stat columns kept as text; every other column is numeric, empty cells as 0
+TEXT_STATS = {'player', 'nationality', 'position', 'team', 'squad', 'comp_level', 'age', 'birth_year'}
+# Columns that only hold links
+SKIP_STATS = {'ranker', 'matches'}
+
+CACHE_DIR = os.path.join('data', 'fbref_cache')
+STORE_DIR = os.path.join('data', 'player_stats')
+TTL_HOURS = 24
+WORKERS = 4
+# fbref asks for no more than 10 requests a minute
+REQUEST_INTERVAL = 6.0
+USER_AGENT = 'Manchester-United-Analysis fbref fetcher'
+
+# fbref ships most tables inside HTML comments
+COMMENT_RE = re.compile('<!--|-->')
+TBODY_RE = re.compile(r'<tbody[\s>]')
+
+
+def category_url(league, category, season=None):
+    comp_id, slug = LEAGUES[league]
+    if season:
+        return f'{BASE_URL}/comps/{comp_id}/{season}/{category}/{season}-{slug}'
+    return f'{BASE_URL}/comps/{comp_id}/{category}/{slug}'
+
+
+# Page cache on disk: <key>.html with the body, <key>.json with the URL,
+# validators and the time the body was last confirmed fresh
+class PageCache:
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode()).hexdigest()
+        return os.path.join(self.cache_dir, key + '.html'), os.path.join(self.cache_dir, key + '.json')
+
+    def get(self, url):
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, encoding='utf-8') as f:
+                return meta, f.read()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None, None
+
+    def put(self, url, meta, body=None):
+        body_path, meta_path = self._paths(url)
+        if body is not None:
+            _write_atomic(body_path, body)
+        _write_atomic(meta_path, json.dumps(meta))
+
+
+def _write_atomic(path, text):
+    tmp_path = f'{path}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class Fetcher:
+    """Fetch pages through one pooled session and the on-disk page cache.
+
+    Safe to call from several threads; workers bounds both the thread pool in
+    fetch_many and the session's connection pool.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl_hours=TTL_HOURS, workers=WORKERS, interval=REQUEST_INTERVAL,
+                 session=None):
+        self.cache = PageCache(cache_dir)
+        self.ttl = ttl_hours * 3600
+        self.workers = workers
+        self.interval = interval
+        self.session = session or _session(workers)
+        self._throttle_lock = threading.Lock()
+        self._next_request = 0.0
+
+    # Hold each request until interval seconds after the previous one started
+    def _wait_turn(self):
+        with self._throttle_lock:
+            now = time.monotonic()
+            wait = self._next_request - now
+            self._next_request = max(now, self._next_request) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def get(self, url):
+        meta, body = self.cache.get(url)
+        if body is not None and time.time() - meta['checked'] < self.ttl:
+            return body
+
+        headers = {}
+        if body is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        self._wait_turn()
+        response = self.session.get(url, headers=headers, timeout=30)
+        if response.status_code == 304 and body is not None:
+            self.cache.put(url, {**meta, 'checked': time.time()})
+            return body
+        response.raise_for_status()
+
+        # fbref pages are UTF-8 but do not always say so in the headers
+        if 'charset' not in response.headers.get('Content-Type', ''):
+            response.encoding = 'utf-8'
+        meta = {'url': url, 'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'), 'checked': time.time()}
+        self.cache.put(url, meta, response.text)
+        return response.text
+
+    def fetch_many(self, urls, parse):
+        """Return {url: parse(page)} for every URL, fetched and parsed in the thread pool."""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(lambda url: parse(self.get(url)), urls)
+            return dict(zip(urls, results))
+
+
+def _session(workers):
+    session = requests.Session()
+    session.headers['User-Agent'] = USER_AGENT
+    # Retry throttling and server errors with backoff, honouring Retry-After
+    retry = Retry(total=3, backoff_factor=2, status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=['GET'])
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# The source of the index-th table body on a page, commented out or not, so
+# lxml only parses that table instead of the whole document
+def extract_tbody(page, index=PLAYER_TABLE):
+    page = COMMENT_RE.sub('', page)
+    starts = [match.start() for match in TBODY_RE.finditer(page)]
+    if len(starts) <= index:
+        raise ValueError(f'page has {len(starts)} table bodies, wanted table {index}')
+    end = page.find('</tbody>', starts[index])
+    if end == -1:
+        raise ValueError(f'table {index} has no closing </tbody>')
+    return page[starts[index]:end + len('</tbody>')]
+
+
+def parse_table(page, index=PLAYER_TABLE):
+    """Return one stat table of an fbref page as a DataFrame named by data-stat."""
+    table = lxml_html.fragment_fromstring(f'<table>{extract_tbody(page, index)}</table>')
+    rows = []
+    for row in table.iter('tr'):
+        # Repeated header rows inside the body have no row header
+        if row.find('th[@scope="row"]') is None:
+            continue
+        rows.append({cell.get('data-stat'): cell.text_content().strip()
+                     for cell in row if cell.get('data-stat') not in SKIP_STATS})
+    frame = pd.DataFrame(rows)
+
+    for column in frame.columns:
+        if column in TEXT_STATS:
+            continue
+        values = frame[column].str.replace(',', '', regex=False)
+        numbers = pd.to_numeric(values, errors='coerce')
+        empty = values == ''
+        # Columns with text that is not a number stay text
+        if (numbers.isna() & ~empty).any():
+            continue
+        frame[column] = numbers.mask(empty, 0.0).astype(float)
+    return frame
+
+
+def player_table(page):
+    return parse_table(page, PLAYER_TABLE)
+
+
+# The categories of one league side by side, keeping the first copy of
+# columns several pages share (player, team, minutes_90s, ...)
+def join_categories(frames):
+    joined = pd.concat(frames, axis=1)
+    return joined.loc[:, ~joined.columns.duplicated()]
+
+
+def fetch_leagues(fetcher, leagues, categories=OUTFIELD_CATEGORIES, season=None):
+    """Return {league: player stats} with every category page of every league fetched concurrently."""
+    urls = {(league, category): category_url(league, category, season) for league in leagues for category in categories}
+    tables = fetcher.fetch_many(list(urls.values()), player_table)
+    return {league: join_categories([tables[urls[league, category]] for category in categories])
+            for league in leagues}
+
+
+def write_player_stats(players, store_dir, league, season=None):
+    table = pa.Table.from_pandas(players, preserve_index=False)
+
+    def write(directory):
+        os.makedirs(directory)
+        pq.write_table(table, os.path.join(directory, 'part-0.parquet'))
+
+    partition = os.path.join(store_dir, f'league={LEAGUES[league][1]}', f'season={season or "current"}')
+    return replace_partition(partition, write)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fetch fbref player stat tables into the player stats store.')
+    parser.add_argument('--league', action='append', choices=list(LEAGUES),
+                        help='league to fetch, repeatable (default: the Big 5 leagues one by one)')
+    parser.add_argument('--season', help='season like 2023-2024 (default: the current season)')
+    parser.add_argument('--keepers', action='store_true', help='fetch the goalkeeping tables instead of outfield')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--ttl', type=float, default=TTL_HOURS, help='hours a cached page is used without revalidating')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='concurrent fetches (default: 4)')
+    parser.add_argument('--interval', type=float, default=REQUEST_INTERVAL,
+                        help='seconds between request starts across all workers (default: 6)')
+    args = parser.parse_args()
+
+    fetcher = Fetcher(cache_dir=args.cache_dir, ttl_hours=args.ttl, workers=args.workers, interval=args.interval)
+    categories = KEEPER_CATEGORIES if args.keepers else OUTFIELD_CATEGORIES
+    store_dir = os.path.join(args.store_dir, 'keepers') if args.keepers else args.store_dir
+    leagues = fetch_leagues(fetcher, args.league or BIG_5, categories, args.season)
+    for league, players in leagues.items():
+        partition = write_player_stats(players, store_dir, league, args.season)
+        print(f'{league}: {len(players)} players, {players.shape[1]} columns -> {partition}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""Parse a directory of WhoScored match JSON files into one season event table.
+
+Replaces the per-match ``pd.concat`` loop in Preprocess Data.ipynb. Matches are
+parsed in a process pool, each parsed match is kept in a per-match cache, and
+the season is concatenated once at the end. Re-running only parses match files
+that are new or changed since the last build. Pass recipients are assigned
+(see recipients.py) before the optional team filter. Qualifiers go to a
+separate long table (see qualifiers.py), with an optional whitelist pivoted
+into columns:
+
+    python "Scrape&Preprocess/ingest.py" whoscored_data/mu_data/2023_2024 \\
+        --team-id 32 --out "data/Manchester United Events 2023-2024 Preprocessed.csv" \\
+        --qualifiers-out data/qualifiers_2023_2024.parquet --pivot-qualifiers PassEndX,PassEndY
+"""
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from qualifiers import add_qualifier_columns, qualifier_table
+from recipients import assign_pass_recipients
+
+RENAME_COLUMNS = {"eventId": "event_id",
+                  "teamId": "team_id",
+                  "playerId": "player_id",
+                  "expandedMinute": "expanded_minute",
+                  "satisfiedEventsTypes": "satisfied_events_types",
+                  "isTouch": "is_touch",
+                  "period.value": "period_value",
+                  "period.displayName": "period_display_name",
+                  "type.value": "type_value",
+                  "type.displayName": "type_display_name",
+                  "outcomeType.value": "outcome_type_value",
+                  "outcomeType.displayName": "outcome_type_display_name",
+                  "endX": "end_x",
+                  "endY": "end_y",
+                  "goalMouthZ": "goal_mouth_z",
+                  "goalMouthY": "goal_mouth_y",
+                  "isShot": "is_shot",
+                  "relatedEventId": "related_event_id",
+                  "relatedPlayerId": "related_player_id",
+                  "blockedX": "blocked_x",
+                  "blockedY": "blocked_y",
+                  "isGoal": "is_goal",
+                  "isOwnGoal": "is_own_goal",
+                  "cardType.value": "card_type_value",
+                  "cardType.displayName": "card_type_display_name"}
+
+MANIFEST_NAME = 'manifest.json'
+# Bumped whenever the cached per-match format changes, so old caches are re-parsed
+CACHE_VERSION = 2
+
+
+def match_id_for(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return int(stem) if stem.isdigit() else stem
+
+
+# Match files in the order the notebook read them: 1.json, 2.json, ..., 10.json
+def match_files(match_dir):
+    names = [name for name in os.listdir(match_dir) if name.endswith('.json')]
+    names.sort(key=lambda name: [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)])
+    return [os.path.join(match_dir, name) for name in names]
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size, CACHE_VERSION]
+
+
+def parse_match(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    events = pd.json_normalize(data['events'])
+    events['match_id'] = match_id_for(path)
+
+    # Player names come from this match's own dictionary
+    player_names = {int(player_id): name for player_id, name in data['playerIdNameDictionary'].items()}
+    if 'playerId' in events.columns:
+        events['player_name'] = events['playerId'].map(player_names)
+    else:
+        events['player_name'] = None
+
+    events = events.rename(columns=RENAME_COLUMNS)
+
+    # Qualifiers are split off while they are still parsed JSON
+    qualifiers = qualifier_table(events)
+    events = events.drop(columns='qualifiers', errors='ignore')
+    return events, qualifiers
+
+
+def _cache_path(cache_dir, path):
+    return os.path.join(cache_dir, os.path.basename(path) + '.pkl')
+
+
+def _parse_to_cache(path, cache_dir):
+    events, qualifiers = parse_match(path)
+    pd.to_pickle({'events': events, 'qualifiers': qualifiers}, _cache_path(cache_dir, path))
+    return path
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_manifest(cache_dir, manifest):
+    tmp_path = os.path.join(cache_dir, MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, os.path.join(cache_dir, MANIFEST_NAME))
+
+
+def ingest(match_dir, cache_dir=None, workers=None):
+    """Return (events, qualifiers) for every match file in match_dir.
+
+    Parsed matches are cached in cache_dir (default ``<match_dir>/.ingest``);
+    only files whose mtime or size changed since the last run are parsed again.
+    """
+    cache_dir = cache_dir or os.path.join(match_dir, '.ingest')
+    os.makedirs(cache_dir, exist_ok=True)
+
+    paths = match_files(match_dir)
+    manifest = _read_manifest(cache_dir)
+    signatures = {os.path.basename(path): file_signature(path) for path in paths}
+    stale = [path for path in paths
+             if manifest.get(os.path.basename(path)) != signatures[os.path.basename(path)]
+             or not os.path.exists(_cache_path(cache_dir, path))]
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for path in executor.map(_parse_to_cache, stale, [cache_dir] * len(stale)):
+                manifest[os.path.basename(path)] = signatures[os.path.basename(path)]
+        _write_manifest(cache_dir, {name: manifest[name] for name in signatures if name in manifest})
+
+    parts = [pd.read_pickle(_cache_path(cache_dir, path)) for path in paths]
+    if not parts:
+        return pd.DataFrame(), qualifier_table(pd.DataFrame())
+    events = pd.concat([part['events'] for part in parts], ignore_index=True)
+    qualifiers = pd.concat([part['qualifiers'] for part in parts], ignore_index=True)
+    qualifiers['qualifier'] = qualifiers['qualifier'].astype('category')
+    return events, qualifiers
+
+
+def write_events(events, out_path):
+    if out_path.endswith('.parquet'):
+        events.to_parquet(out_path, index=False)
+    else:
+        events.to_csv(out_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest WhoScored match JSON files into a season event table.')
+    parser.add_argument('match_dir', help='directory of <n>.json match files')
+    parser.add_argument('--out', required=True, help='output .csv or .parquet path')
+    parser.add_argument('--team-id', type=int, help='keep only this team\'s events, e.g. 32 for Manchester United')
+    parser.add_argument('--cache-dir', help='per-match cache directory (default: <match_dir>/.ingest)')
+    parser.add_argument('--workers', type=int, help='parser processes (default: CPU count)')
+    parser.add_argument('--qualifiers-out', help='write the long-format qualifier table to this .csv or .parquet path')
+    parser.add_argument('--pivot-qualifiers', help='comma-separated qualifier names to add as event columns')
+    args = parser.parse_args()
+
+    events, qualifiers = ingest(args.match_dir, cache_dir=args.cache_dir, workers=args.workers)
+    events = assign_pass_recipients(events)
+    if args.team_id is not None:
+        events = events.loc[events.team_id == args.team_id].reset_index(drop=True)
+        qualifiers = qualifiers.loc[qualifiers['id'].isin(events['id'])].reset_index(drop=True)
+    if args.pivot_qualifiers:
+        events = add_qualifier_columns(events, qualifiers, args.pivot_qualifiers.split(','))
+    write_events(events, args.out)
+    if args.qualifiers_out:
+        write_events(qualifiers, args.qualifiers_out)
+    print(f'{len(events)} events from {events.match_id.nunique()} matches -> {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Atomic replacement of Parquet partition directories.
+
+A partition such as data/events/season=2023-2024 is a symlink to a hidden,
+versioned directory next to it (.season=2023-2024.<n>). A new version is
+written in full, then the link is replaced with one os.replace, so a reader
+resolving the partition path sees either the old files or the new ones and
+never a missing or half-written partition. The version just replaced is kept
+until the next write, for readers that resolved the old link a moment before.
+"""
+import os
+import shutil
+import time
+
+
+def _versions(parent, name):
+    prefix = f'.{name}.'
+    return [entry for entry in os.listdir(parent) if entry.startswith(prefix) and entry[len(prefix):].isdigit()]
+
+
+def replace_partition(partition, write):
+    """Call write(directory) to fill a new version of partition, then swap it in."""
+    parent, name = os.path.split(partition)
+    os.makedirs(parent, exist_ok=True)
+    version = f'.{name}.{time.time_ns()}'
+    version_dir = os.path.join(parent, version)
+    write(version_dir)
+
+    previous = os.readlink(partition) if os.path.islink(partition) else None
+    if os.path.isdir(partition) and previous is None:
+        # A plain directory from before partitions were versioned; moved aside once,
+        # the only time the partition is briefly missing
+        legacy = os.path.join(parent, f'.{name}.0')
+        shutil.rmtree(legacy, ignore_errors=True)
+        os.rename(partition, legacy)
+        previous = os.path.basename(legacy)
+
+    link = os.path.join(parent, version + '.link')
+    os.symlink(version, link)
+    os.replace(link, partition)
+
+    for stale in _versions(parent, name):
+        if stale not in (version, previous):
+            shutil.rmtree(os.path.join(parent, stale), ignore_errors=True)
+    return partition
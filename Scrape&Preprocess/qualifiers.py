@@ -0,0 +1,49 @@
+"""Qualifier extraction for WhoScored events.
+
+Qualifiers are read from the parsed match JSON (lists of dicts), never from a
+stringified column, and kept in long format: one row per (event id,
+qualifier). Only a chosen whitelist is pivoted into dense event columns,
+instead of one mostly-empty column per qualifier name ever seen.
+"""
+import numpy as np
+import pandas as pd
+
+QUALIFIER_COLUMNS = ['match_id', 'id', 'qualifier_id', 'qualifier', 'value']
+
+
+def qualifier_table(events):
+    if 'qualifiers' not in events.columns:
+        return pd.DataFrame(columns=QUALIFIER_COLUMNS)
+
+    qualifier_lists = [item if isinstance(item, list) else [] for item in events['qualifiers']]
+    counts = np.fromiter((len(item) for item in qualifier_lists), dtype=np.intp, count=len(qualifier_lists))
+    flat = [qualifier for item in qualifier_lists for qualifier in item]
+
+    qualifiers = pd.DataFrame({
+        'match_id': np.repeat(events['match_id'].to_numpy(), counts),
+        'id': np.repeat(events['id'].to_numpy(), counts),
+        'qualifier_id': [qualifier['type']['value'] for qualifier in flat],
+        'qualifier': pd.Categorical([qualifier['type']['displayName'] for qualifier in flat]),
+        # Flag qualifiers (e.g. Cross, Chipped) carry no value
+        'value': [qualifier.get('value') for qualifier in flat],
+    })
+    return qualifiers
+
+
+# Dense columns for the given qualifier names, one row per event id. Flag
+# qualifiers become True; when an event repeats a qualifier the last one wins.
+def pivot_qualifiers(qualifiers, names):
+    selected = qualifiers.loc[qualifiers['qualifier'].isin(names), ['id', 'qualifier', 'value']]
+    selected = selected.drop_duplicates(['id', 'qualifier'], keep='last')
+    values = selected['value'].astype(object).where(selected['value'].notna(), True)
+    pivoted = pd.DataFrame({'id': selected['id'].to_numpy(),
+                            'qualifier': selected['qualifier'].astype(str).to_numpy(),
+                            'value': values.to_numpy()})
+    pivoted = pivoted.pivot(index='id', columns='qualifier', values='value')
+    pivoted = pivoted.reindex(columns=list(names))
+    pivoted.columns.name = None
+    return pivoted.reset_index()
+
+
+def add_qualifier_columns(events, qualifiers, names):
+    return events.merge(pivot_qualifiers(qualifiers, names), on='id', how='left')
@@ -0,0 +1,46 @@
+"""Pass recipient assignment for WhoScored events.
+
+The recipient of a successful pass is the player on the next touch event by
+the same team in the same match and period. Non-touch events in between
+(e.g. the opponent's challenges, cards, substitutions) are skipped, and a pass
+at the end of a match or half gets no recipient rather than whoever touches
+the ball in the next one. Events must be in feed order.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _group_keys(events):
+    keys = ['match_id', 'team_id']
+    if 'period_value' in events.columns:
+        keys.append('period_value')
+    return [events[key] for key in keys]
+
+
+def assign_pass_recipients(events):
+    events = events.copy()
+    if 'is_touch' in events.columns:
+        touches = events['is_touch'].fillna(False).astype(bool).to_numpy()
+    else:
+        touches = np.ones(len(events), dtype=bool)
+
+    # Row position of the next touch within each group: shift every touch back
+    # by one, then fill non-touch rows with the next touch that follows them
+    group_keys = _group_keys(events)
+    touch_position = pd.Series(np.where(touches, np.arange(len(events)), np.nan), index=events.index)
+    next_touch = touch_position.groupby(group_keys, sort=False).shift(-1)
+    next_touch = next_touch.groupby(group_keys, sort=False).bfill()
+
+    successful_pass = ((events['type_display_name'] == 'Pass') &
+                       (events['outcome_type_display_name'] == 'Successful')).to_numpy()
+    has_recipient = successful_pass & next_touch.notna().to_numpy()
+    recipient_position = next_touch.to_numpy()[has_recipient].astype(np.intp)
+
+    recipient_name = np.full(len(events), np.nan, dtype=object)
+    recipient_name[has_recipient] = events['player_name'].to_numpy(dtype=object)[recipient_position]
+    recipient_id = np.full(len(events), np.nan)
+    recipient_id[has_recipient] = events['player_id'].to_numpy(dtype=float)[recipient_position]
+
+    events['pass_recipient_name'] = recipient_name
+    events['pass_recipient_id'] = recipient_id
+    return events
@@ -0,0 +1,99 @@
+import http.server
+import threading
+
+import pandas as pd
+import pytest
+
+import fbref
+
+ETAG = '"v1"'
+
+
+# A stat page laid out like fbref's: the squad table in the page, the player
+# table commented out, with a repeated header row inside its body
+def stat_page(category):
+    squad = ('<table id="stats_squads"><tbody><tr><th scope="row" data-stat="squad">Arsenal</th>'
+             '<td data-stat="players_used">25</td></tr></tbody></table>')
+    rows = [f'<tr><th scope="row" data-stat="ranker">1</th><td data-stat="player">Bruno Fernandes</td>'
+            f'<td data-stat="team">Manchester Utd</td><td data-stat="age">29-123</td>'
+            f'<td data-stat="minutes_90s">35.4</td><td data-stat="{category}_total">1,234</td>'
+            f'<td data-stat="matches"><a href="/matchlogs">Matches</a></td></tr>',
+            '<tr class="thead"><th data-stat="ranker">Rk</th><th data-stat="player">Player</th></tr>',
+            f'<tr><th scope="row" data-stat="ranker">2</th><td data-stat="player">Rasmus Højlund</td>'
+            f'<td data-stat="team">Manchester Utd</td><td data-stat="age">21-020</td>'
+            f'<td data-stat="minutes_90s">24.1</td><td data-stat="{category}_total"></td>'
+            f'<td data-stat="matches"><a href="/matchlogs">Matches</a></td></tr>']
+    player = f'<table id="stats_{category}"><tbody>{"".join(rows)}</tbody></table>'
+    return f'<html><body>{squad}<div class="placeholder"><!--\n{player}\n--></div></body></html>'
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    requests_seen = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append((self.path, self.headers.get('If-None-Match')))
+            if self.headers.get('If-None-Match') == ETAG:
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = stat_page(self.path.split('/')[-2]).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', ETAG)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(fbref, 'BASE_URL', f'http://127.0.0.1:{server.server_port}/en')
+    yield requests_seen
+    server.shutdown()
+    server.server_close()
+
+
+def test_parses_player_table(stub_server, tmp_path):
+    fetcher = fbref.Fetcher(cache_dir=tmp_path, interval=0)
+    players = fbref.fetch_leagues(fetcher, ['Premier League'], ['stats', 'shooting'])['Premier League']
+
+    expected = pd.DataFrame({'player': ['Bruno Fernandes', 'Rasmus Højlund'],
+                             'team': ['Manchester Utd', 'Manchester Utd'],
+                             'age': ['29-123', '21-020'],
+                             'minutes_90s': [35.4, 24.1],
+                             'stats_total': [1234.0, 0.0],
+                             'shooting_total': [1234.0, 0.0]})
+    pd.testing.assert_frame_equal(players.reset_index(drop=True), expected, check_dtype=False)
+    assert players['minutes_90s'].dtype == float
+    assert len(stub_server) == 2
+
+
+def test_no_request_within_ttl(stub_server, tmp_path):
+    url = fbref.category_url('Premier League', 'stats')
+    page = fbref.Fetcher(cache_dir=tmp_path, interval=0).get(url)
+
+    assert fbref.Fetcher(cache_dir=tmp_path, interval=0, ttl_hours=1).get(url) == page
+    assert len(stub_server) == 1
+
+
+def test_revalidates_with_etag_after_ttl(stub_server, tmp_path):
+    url = fbref.category_url('Premier League', 'stats')
+    page = fbref.Fetcher(cache_dir=tmp_path, interval=0).get(url)
+
+    assert fbref.Fetcher(cache_dir=tmp_path, interval=0, ttl_hours=0).get(url) == page
+    assert stub_server == [('/en/comps/9/stats/Premier-League-Stats', None),
+                           ('/en/comps/9/stats/Premier-League-Stats', ETAG)]
+
+
+def test_write_player_stats_replaces_partition(tmp_path):
+    first = pd.DataFrame({'player': ['Bruno Fernandes'], 'minutes_90s': [35.4]})
+    second = pd.DataFrame({'player': ['Bruno Fernandes', 'Rasmus Højlund'], 'minutes_90s': [35.4, 24.1]})
+    fbref.write_player_stats(first, tmp_path, 'Premier League', '2023-2024')
+    partition = fbref.write_player_stats(second, tmp_path, 'Premier League', '2023-2024')
+
+    pd.testing.assert_frame_equal(pd.read_parquet(partition), second)
@@ -0,0 +1,129 @@
+"""Benchmark the dashboard pipeline on synthetic events.
+
+Run from the repository root:
+
+    python benchmarks/pipeline.py
+    python benchmarks/pipeline.py --teams 20 --matches 380 --repeat 3 --json results.json
+
+A season of synthetic events (see synthetic.py) is written to a scratch
+directory as a preprocessed CSV and a columnar store partition, then each
+stage is timed: CSV and columnar load, progressive-pass classification, the
+event index and per-player filtering, aggregates, heatmap binning, and a render
+of every map type for the busiest player (after one untimed render that
+draws the cached pitch background). Each stage reports its median wall
+time and, from a separate traced run, its peak Python heap allocation
+(tracemalloc; Arrow buffers are not included). The process's peak resident
+memory is printed at the end. --json writes the results for comparing runs.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use('Agg')
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, 'dashboard'))
+sys.path.insert(0, os.path.join(REPO_DIR, 'Scrape&Preprocess'))
+
+from aggregates import build_player_aggregates, player_aggregates
+from build_event_store import write_season as write_store_season
+from data_loader import read_events
+from event_index import EventIndex
+from heatmaps import RECEIVED_PASSES, HeatmapCube
+from map_specs import MAP_SPECS, map_events
+from maps import render_map
+from passes import add_progressive_pass_column
+from synthetic import generate_season, write_season
+
+SEASON = '2023-2024'
+
+
+def measure(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, statistics.median(times), peak
+
+
+def run(teams, matches, repeat, seed=0):
+    results = []
+
+    def stage(name, function):
+        result, seconds, peak = measure(function, repeat)
+        results.append({'stage': name, 'seconds': seconds, 'peak_bytes': peak})
+        print(f'  {name:<28} {seconds:9.4f}s {peak / 2**20:10.1f} MiB', flush=True)
+        return result
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        start = time.perf_counter()
+        events = generate_season(teams, matches, seed=seed)
+        csv_path = write_season(events, data_dir, SEASON)
+        store_path = write_store_season(events, os.path.join(data_dir, 'events'), SEASON)
+        print(f'{len(events)} events, {events.match_id.nunique()} matches, {events.player_id.nunique()} players '
+              f'(generated in {time.perf_counter() - start:.1f}s)')
+        del events
+
+        print(f'  {"stage":<28} {"wall":>10} {"peak heap":>14}')
+        stage('load_csv', lambda: read_events(csv_path))
+        events = stage('load_columnar', lambda: read_events(store_path))
+
+        unclassified = events.drop(columns='is_progressive')
+        stage('progressive_classification', lambda: add_progressive_pass_column(unclassified.copy()))
+
+        event_index = stage('event_index', lambda: EventIndex(SEASON, events))
+        player_ids = list(event_index.player_ids.values())
+        stage('player_filtering', lambda: [event_index.player_events(player_id, source)
+                                           for player_id in player_ids
+                                           for source in {spec['source'] for spec in MAP_SPECS.values()}
+                                           if source != RECEIVED_PASSES])
+
+        aggregates = stage('aggregates', lambda: build_player_aggregates(events))
+        player_list = events[['player_name', 'player_id']].drop_duplicates().dropna().astype({'player_name': str})
+        heatmaps = stage('heatmap_binning', lambda: HeatmapCube.build(events, player_list))
+
+        busiest = events['player_id'].value_counts().index[0]
+        player_name = player_list.loc[player_list['player_id'] == busiest, 'player_name'].iloc[0]
+        stats = player_aggregates(aggregates, busiest)
+        for map_type in MAP_SPECS:
+            map_data = map_events(event_index, lambda: heatmaps, map_type, busiest)
+            # The first map of each pitch style also draws the cached background
+            render_map(map_type, map_data, player_name, SEASON, stats)
+            stage(f'render_{map_type}', lambda: render_map(map_type, map_data, player_name, SEASON, stats))
+
+    # ru_maxrss is in KiB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(f'peak resident memory: {peak_rss / 2**20:.0f} MiB')
+    return {'teams': teams, 'matches': matches, 'repeat': repeat, 'stages': results, 'peak_rss_bytes': peak_rss}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time each stage of the dashboard pipeline on synthetic events.')
+    parser.add_argument('--teams', type=int, default=20, help='teams in the synthetic league (default: 20)')
+    parser.add_argument('--matches', type=int, default=38, help='matches in the season (default: 38)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage, median reported (default: 3)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write the results to this path')
+    args = parser.parse_args()
+
+    results = run(args.teams, args.matches, args.repeat, seed=args.seed)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Cold start benchmark for the dashboard.
+
+Run from the repository root (where data/ lives):
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 5
+
+Every measurement runs in a fresh interpreter so nothing is already imported or
+loaded. It reports the import time of each dashboard module on its own, and for
+a first visit to the dashboard the time until the first element, the sidebar's
+player picker and the stats tables are on screen, until the first map is drawn,
+and until the whole page is done.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DASHBOARD_DIR = os.path.join(REPO_DIR, 'dashboard')
+DASHBOARD = os.path.join(DASHBOARD_DIR, 'dashboard.py')
+
+# Modules the dashboard imports at start-up, plus the map module it defers
+MODULES = ['streamlit', 'pandas', 'data_loader', 'map_specs', 'render_cache', 'maps']
+
+IMPORT_SNIPPET = '''
+import sys, time
+sys.path.insert(0, {dashboard_dir!r})
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+'''
+
+
+def time_import(module):
+    code = IMPORT_SNIPPET.format(dashboard_dir=DASHBOARD_DIR, module=module)
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+# Runs in the child process: one AppTest run of the dashboard with every element
+# the script sends to the browser timestamped as it is sent
+def first_visit():
+    start = time.perf_counter()
+    from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+    from streamlit.testing.v1 import AppTest
+
+    paints = []
+    enqueue = ForwardMsgQueue.enqueue
+
+    def timed_enqueue(self, msg):
+        if msg.HasField('delta') and msg.delta.HasField('new_element'):
+            paints.append((time.perf_counter() - start, msg.delta.new_element.WhichOneof('type')))
+        return enqueue(self, msg)
+
+    ForwardMsgQueue.enqueue = timed_enqueue
+
+    app = AppTest.from_file(DASHBOARD, default_timeout=600)
+    app.run()
+    total = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+
+    def first(types):
+        return next((elapsed for elapsed, element_type in paints if element_type in types), None)
+
+    return {
+        'first_paint': paints[0][0] if paints else None,
+        'player_picker': first({'selectbox'}),
+        'stats_tables': first({'dataframe', 'arrow_data_frame'}),
+        'first_map': first({'imgs'}),
+        'total': total,
+    }
+
+
+def time_first_visit():
+    code = f'import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); ' \
+           f'import json, startup; print(json.dumps(startup.first_visit()))'
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _format(seconds):
+    return '-' if seconds is None else f'{seconds:.3f}s'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the dashboard cold start.')
+    parser.add_argument('--runs', type=int, default=3, help='fresh processes per measurement, median reported')
+    args = parser.parse_args()
+
+    print('import time (each module in a fresh interpreter)')
+    for module in MODULES:
+        times = [time_import(module) for _ in range(args.runs)]
+        print(f'  {module:<14} {_format(statistics.median(times))}')
+
+    print('first visit (fresh interpreter, default season and player)')
+    visits = [time_first_visit() for _ in range(args.runs)]
+    for stage in ['first_paint', 'player_picker', 'stats_tables', 'first_map', 'total']:
+        times = [visit[stage] for visit in visits if visit[stage] is not None]
+        print(f'  {stage:<14} {_format(statistics.median(times) if times else None)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""Synthetic WhoScored-schema events, from one match to a full league over several seasons.
+
+Run from the repository root:
+
+    python benchmarks/synthetic.py --matches 1 --out-dir /tmp/synthetic
+    python benchmarks/synthetic.py --teams 20 --seasons 3 --out-dir /tmp/league --raw
+
+Each season is written as a preprocessed events CSV named like the real ones
+(Manchester United Events <season> Preprocessed.csv), with the columns
+Scrape&Preprocess/ingest.py produces, so it can be fed to build_event_store.py,
+aggregates.py, heatmaps.py and the dashboard. With --raw every match is also
+written as WhoScored match JSON (<season>/<n>.json) for ingest.py. The same
+seed always gives the same events.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Scrape&Preprocess'))
+from recipients import assign_pass_recipients
+
+EVENTS_PER_MATCH = 1700
+PLAYERS_PER_TEAM = 25
+FIRST_TEAM_ID = 32  # the first team is Manchester United's WhoScored id
+
+# (type value, type_display_name, share of events, share successful)
+EVENT_TYPES = [(1, 'Pass', 0.52, 0.8),
+               (61, 'BallTouch', 0.06, 0.7),
+               (49, 'BallRecovery', 0.05, 1.0),
+               (44, 'Aerial', 0.05, 0.5),
+               (12, 'Clearance', 0.04, 0.9),
+               (7, 'Tackle', 0.03, 0.6),
+               (3, 'TakeOn', 0.03, 0.45),
+               (8, 'Interception', 0.02, 1.0),
+               (4, 'Foul', 0.03, 0.5),
+               (10, 'Save', 0.02, 1.0),
+               (15, 'SavedShot', 0.012, 1.0),
+               (13, 'MissedShots', 0.012, 0.0),
+               (16, 'Goal', 0.006, 1.0),
+               (5, 'Out', 0.04, 0.0),
+               (2, 'OffsidePass', 0.003, 0.0),
+               (18, 'SubstitutionOff', 0.002, 1.0),
+               (19, 'SubstitutionOn', 0.002, 1.0),
+               (17, 'Card', 0.003, 1.0)]
+NON_TOUCH_TYPES = {'Foul', 'Out', 'SubstitutionOff', 'SubstitutionOn', 'Card'}
+SHOT_TYPES = {'SavedShot', 'MissedShots', 'Goal'}
+
+PERIODS = [(1, 'FirstHalf'), (2, 'SecondHalf')]
+
+
+def season_name(first_year, offset):
+    start = first_year + offset
+    return f'{start}-{start + 1}'
+
+
+def player_names(team_ids):
+    return {team_id * 100 + number: f'Player {team_id}-{number}'
+            for team_id in team_ids for number in range(1, PLAYERS_PER_TEAM + 1)}
+
+
+# Double round robin between the teams, cut to max_matches if given
+def fixtures(team_ids, max_matches=None):
+    pairs = [(home, away) for home in team_ids for away in team_ids if home != away]
+    return pairs[:max_matches] if max_matches else pairs
+
+
+def generate_match(rng, match_id, home, away, events_per_match=EVENTS_PER_MATCH):
+    n = events_per_match
+    shares = np.array([share for _, _, share, _ in EVENT_TYPES])
+    type_index = rng.choice(len(EVENT_TYPES), size=n, p=shares / shares.sum())
+    type_names = np.array([name for _, name, _, _ in EVENT_TYPES], dtype=object)[type_index]
+    successful = rng.random(n) < np.array([rate for _, _, _, rate in EVENT_TYPES])[type_index]
+
+    # Possession switches every few events, with the team in possession on the ball
+    possession = np.cumsum(rng.random(n) < 0.15) % 2
+    team_id = np.where(possession == 0, home, away)
+    player_id = team_id * 100 + rng.integers(1, 12, size=n)
+
+    seconds = np.sort(rng.integers(0, 95 * 60, size=n))
+    period = np.where(seconds < 47 * 60, 0, 1)
+
+    x = np.round(rng.uniform(0, 100, size=n), 1)
+    y = np.round(rng.uniform(0, 100, size=n), 1)
+    is_shot = np.isin(type_names, list(SHOT_TYPES))
+    x[is_shot] = np.round(rng.uniform(70, 99, size=is_shot.sum()), 1)
+    is_pass = type_names == 'Pass'
+    end_x = np.where(is_pass, np.clip(np.round(x + rng.normal(8, 20, size=n), 1), 0, 100), np.nan)
+    end_y = np.where(is_pass, np.clip(np.round(y + rng.normal(0, 20, size=n), 1), 0, 100), np.nan)
+
+    return pd.DataFrame({
+        'id': match_id * 10_000 + np.arange(n),
+        'event_id': np.arange(1, n + 1),
+        'minute': seconds // 60,
+        'second': seconds % 60,
+        'team_id': team_id,
+        'player_id': player_id.astype(float),
+        'x': x,
+        'y': y,
+        'expanded_minute': seconds // 60,
+        'period_value': np.array([value for value, _ in PERIODS])[period],
+        'period_display_name': np.array([name for _, name in PERIODS], dtype=object)[period],
+        'type_value': np.array([value for value, _, _, _ in EVENT_TYPES])[type_index],
+        'type_display_name': type_names,
+        'outcome_type_value': successful.astype(int),
+        'outcome_type_display_name': np.where(successful, 'Successful', 'Unsuccessful'),
+        'end_x': end_x,
+        'end_y': end_y,
+        'is_touch': ~np.isin(type_names, list(NON_TOUCH_TYPES)),
+        'is_shot': np.where(is_shot, True, None),
+        'is_goal': np.where(type_names == 'Goal', True, None),
+        'match_id': match_id,
+    })
+
+
+def generate_season(teams=20, matches=None, seed=0, events_per_match=EVENTS_PER_MATCH):
+    """Return one season's events for every fixture, with names and pass recipients."""
+    rng = np.random.default_rng(seed)
+    team_ids = [FIRST_TEAM_ID + team for team in range(teams)]
+    names = player_names(team_ids)
+    parts = [generate_match(rng, match_id, home, away, events_per_match)
+             for match_id, (home, away) in enumerate(fixtures(team_ids, matches), start=1)]
+    events = pd.concat(parts, ignore_index=True)
+    events['player_name'] = events['player_id'].map(names)
+    return assign_pass_recipients(events)
+
+
+# One match back in the nested layout of a WhoScored match page
+def match_json(match_events):
+    events = []
+    for row in match_events.to_dict('records'):
+        event = {'id': row['id'], 'eventId': row['event_id'], 'minute': row['minute'], 'second': row['second'],
+                 'teamId': row['team_id'], 'playerId': int(row['player_id']), 'x': row['x'], 'y': row['y'],
+                 'expandedMinute': row['expanded_minute'],
+                 'period': {'value': row['period_value'], 'displayName': row['period_display_name']},
+                 'type': {'value': row['type_value'], 'displayName': row['type_display_name']},
+                 'outcomeType': {'value': row['outcome_type_value'], 'displayName': row['outcome_type_display_name']},
+                 'qualifiers': [], 'satisfiedEventsTypes': [], 'isTouch': row['is_touch']}
+        if not pd.isna(row['end_x']):
+            event['endX'], event['endY'] = row['end_x'], row['end_y']
+            event['qualifiers'] = [{'type': {'value': 140, 'displayName': 'PassEndX'}, 'value': str(row['end_x'])},
+                                   {'type': {'value': 141, 'displayName': 'PassEndY'}, 'value': str(row['end_y'])}]
+        if row['is_shot']:
+            event['isShot'] = True
+        if row['is_goal']:
+            event['isGoal'] = True
+        events.append(event)
+    players = match_events[['player_id', 'player_name']].drop_duplicates()
+    return {'events': events,
+            'playerIdNameDictionary': {str(int(player_id)): name
+                                       for player_id, name in zip(players['player_id'], players['player_name'])}}
+
+
+def write_season(events, out_dir, season, raw=False):
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f'Manchester United Events {season} Preprocessed.csv')
+    events.to_csv(path)
+    if raw:
+        match_dir = os.path.join(out_dir, season)
+        os.makedirs(match_dir, exist_ok=True)
+        for match_id, match_events in events.groupby('match_id', sort=False):
+            with open(os.path.join(match_dir, f'{match_id}.json'), 'w') as f:
+                json.dump(match_json(match_events), f, default=_json_default)
+    return path
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'cannot serialise {type(value).__name__}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic WhoScored-schema event tables.')
+    parser.add_argument('--out-dir', required=True, help='directory for the season CSVs (e.g. a scratch data/ dir)')
+    parser.add_argument('--teams', type=int, default=20, help='teams in the league (default: 20)')
+    parser.add_argument('--matches', type=int, help='matches per season (default: full double round robin)')
+    parser.add_argument('--seasons', type=int, default=1, help='number of seasons (default: 1)')
+    parser.add_argument('--first-season', type=int, default=2023, help='start year of the first season')
+    parser.add_argument('--events-per-match', type=int, default=EVENTS_PER_MATCH)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--raw', action='store_true', help='also write WhoScored match JSON per match')
+    args = parser.parse_args()
+
+    for offset in range(args.seasons):
+        season = season_name(args.first_season, offset)
+        events = generate_season(args.teams, args.matches, seed=args.seed + offset,
+                                 events_per_match=args.events_per_match)
+        path = write_season(events, args.out_dir, season, raw=args.raw)
+        print(f'{season}: {len(events)} events from {events.match_id.nunique()} matches -> {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Per-player season aggregates for every event family the maps show.
+
+Build the tables ahead of time, from the repository root, with:
+
+    python dashboard/aggregates.py 2022-2023 2023-2024
+
+The dashboard reads data/aggregates/<season>.parquet when it is newer than the
+season's events and otherwise computes the table once per process.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+AGGREGATES_DIR = os.path.join('data', 'aggregates')
+
+# (rate column, successful count column, unsuccessful count column)
+RATES = [('aerial_success_rate', 'aerials_successful', 'aerials_unsuccessful'),
+         ('take_on_success_rate', 'take_ons_successful', 'take_ons_unsuccessful'),
+         ('tackle_success_rate', 'tackles_successful', 'tackles_unsuccessful'),
+         ('pass_completion_rate', 'passes_successful', 'passes_unsuccessful'),
+         ('progressive_pass_completion_rate', 'progressive_passes_successful', 'progressive_passes_unsuccessful'),
+         ('forward_pass_completion_rate', 'forward_passes_successful', 'forward_passes_unsuccessful')]
+
+
+def aggregates_path(season):
+    return os.path.join(AGGREGATES_DIR, f'{season}.parquet')
+
+
+def _rate(successful, total):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total > 0, np.round(successful / total * 100, 2), 0)
+
+
+def _event_flags(events):
+    event_type = events['type_display_name']
+    successful = events['outcome_type_display_name'] == 'Successful'
+    unsuccessful = events['outcome_type_display_name'] == 'Unsuccessful'
+    shot_zone = (events['period_display_name'] != 'PenaltyShootout') & (events['x'] >= 50.0)
+    is_pass = event_type == 'Pass'
+    forward_pass = is_pass & (events['end_x'] > events['x'] + 1)
+
+    flags = {
+        'goals': shot_zone & (event_type == 'Goal'),
+        'saved_shots': shot_zone & (event_type == 'SavedShot'),
+        'missed_shots': shot_zone & (event_type == 'MissedShots'),
+        'passes_successful': is_pass & successful,
+        'passes_unsuccessful': is_pass & unsuccessful,
+        'progressive_passes_successful': events['is_progressive'] & successful,
+        'progressive_passes_unsuccessful': events['is_progressive'] & unsuccessful,
+        'forward_passes_successful': forward_pass & successful,
+        'forward_passes_unsuccessful': forward_pass & unsuccessful,
+        'clearances': (event_type == 'Clearance') & successful,
+        'recoveries': (event_type == 'BallRecovery') & successful,
+        'interceptions': (event_type == 'Interception') & successful,
+    }
+    for column, event_name in [('aerials', 'Aerial'), ('take_ons', 'TakeOn'), ('tackles', 'Tackle')]:
+        flags[f'{column}_successful'] = (event_type == event_name) & successful
+        flags[f'{column}_unsuccessful'] = (event_type == event_name) & unsuccessful
+    return pd.DataFrame(flags)
+
+
+# One row per player with the counts and rates shown in the map headers,
+# computed with a single groupby over the season's events
+def build_player_aggregates(events):
+    players = events[['player_id', 'player_name']].dropna().drop_duplicates('player_id')
+    counts = _event_flags(events).groupby(events['player_id']).sum()
+
+    players['player_name'] = players['player_name'].astype(str)
+    aggregates = players.set_index('player_id').join(counts, how='left').fillna(0)
+    count_columns = list(counts.columns)
+    aggregates[count_columns] = aggregates[count_columns].astype('int64')
+
+    received = events.groupby('pass_recipient_name', observed=True).size()
+    aggregates['passes_received'] = aggregates['player_name'].map(received).fillna(0).astype('int64')
+
+    aggregates['shots'] = aggregates['goals'] + aggregates['saved_shots'] + aggregates['missed_shots']
+    aggregates['shot_conversion_rate'] = _rate(aggregates['goals'], aggregates['shots'])
+    for rate, successful, unsuccessful in RATES:
+        aggregates[rate] = _rate(aggregates[successful], aggregates[successful] + aggregates[unsuccessful])
+
+    return aggregates.sort_values('player_name').reset_index()
+
+
+def player_aggregates(aggregates, player_id):
+    row = aggregates.loc[aggregates['player_id'] == player_id]
+    if row.empty:
+        # Zero row in the table's own dtypes, so counts still read as integers
+        row = aggregates.iloc[:0].reindex([0]).fillna(0).astype(aggregates.dtypes.to_dict())
+    return row.iloc[0]
+
+
+def main():
+    from data_loader import load_events
+
+    parser = argparse.ArgumentParser(description='Build the per-player aggregates table for each season.')
+    parser.add_argument('seasons', nargs='+', help='seasons to build, e.g. 2023-2024')
+    args = parser.parse_args()
+
+    os.makedirs(AGGREGATES_DIR, exist_ok=True)
+    for season in args.seasons:
+        aggregates = build_player_aggregates(load_events(season))
+        aggregates.to_parquet(aggregates_path(season), index=False)
+        print(f'{season}: {len(aggregates)} players -> {aggregates_path(season)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Render every map for every player of a season, headless and in parallel.
+
+Run from the repository root after each matchday:
+
+    python dashboard/batch_render.py 2023-2024 --out renders
+    python dashboard/batch_render.py 2023-2024 --out renders --map shot --map pass --workers 4
+
+Images are content addressed: each file is named after a hash of the map's
+input events, header stats and renderer version, so maps whose inputs have not
+changed are skipped. renders/<season>/manifest.json maps each player and map
+type to its image; runs limited by --player or --map only update their entries.
+"""
+import matplotlib
+matplotlib.use('Agg')
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from aggregates import player_aggregates
+from data_loader import load_aggregates, load_event_index, load_heatmaps, load_player_list
+from map_specs import MAP_SPECS, map_events
+from render_pool import render_image
+
+# Bump when the look of the maps changes so existing images are re-rendered
+RENDER_VERSION = 3
+
+
+def content_key(map_type, player_name, season, events, stats, format):
+    digest = hashlib.sha256()
+    digest.update(json.dumps([RENDER_VERSION, map_type, player_name, season, format]).encode())
+    if isinstance(events, np.ndarray):
+        digest.update(events.tobytes())
+    else:
+        digest.update(pd.util.hash_pandas_object(events, index=False).to_numpy().tobytes())
+    digest.update(stats.to_json().encode())
+    return digest.hexdigest()
+
+
+def output_path(out_dir, key, format):
+    return os.path.join(out_dir, key[:2], f'{key}.{format}')
+
+
+def render_to_file(map_type, events, player_name, season, stats, format, path):
+    image = render_image(map_type, events, player_name, season, stats, format=format)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(image)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def render_season(season, out_dir, map_types=None, players=None, format='png', workers=None):
+    event_index = load_event_index(season)
+    aggregates = load_aggregates(season)
+    player_list = load_player_list(season)
+    if players:
+        player_list = player_list.loc[player_list['player_name'].isin(players)]
+    map_types = map_types or list(MAP_SPECS)
+
+    # Runs limited to some players or maps only update their own entries
+    manifest_path = os.path.join(out_dir, season, 'manifest.json')
+    manifest = read_manifest(manifest_path)
+    entries = 0
+    jobs = []
+    for player_name, player_id in zip(player_list['player_name'], player_list['player_id']):
+        stats = player_aggregates(aggregates, player_id)
+        for map_type in map_types:
+            events = map_events(event_index, lambda: load_heatmaps(season), map_type, player_id)
+            key = content_key(map_type, player_name, season, events, stats, format)
+            path = output_path(out_dir, key, format)
+            manifest.setdefault(player_name, {})[map_type] = os.path.relpath(path, out_dir)
+            entries += 1
+            if not os.path.exists(path):
+                jobs.append((map_type, events, player_name, season, stats, format, path))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(render_to_file, *job) for job in jobs]
+        for future in as_completed(futures):
+            future.result()
+
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+    return len(jobs), entries - len(jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render every map for every player of a season.')
+    parser.add_argument('season', help='season to render, e.g. 2023-2024')
+    parser.add_argument('--out', default='renders', help='output directory (default: renders)')
+    parser.add_argument('--map', action='append', choices=list(MAP_SPECS), help='map type to render (default: all)')
+    parser.add_argument('--player', action='append', help='player name to render (default: whole squad)')
+    parser.add_argument('--format', default='png', choices=['png', 'svg'])
+    parser.add_argument('--workers', type=int, help='render processes (default: CPU count)')
+    args = parser.parse_args()
+
+    rendered, skipped = render_season(args.season, args.out, map_types=args.map, players=args.player,
+                                      format=args.format, workers=args.workers)
+    print(f'{args.season}: rendered {rendered} maps, {skipped} unchanged -> {args.out}')
+
+
+if __name__ == '__main__':
+    main()
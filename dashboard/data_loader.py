@@ -0,0 +1,207 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from aggregates import aggregates_path, build_player_aggregates
+from event_index import EventIndex, encode_categoricals
+from heatmaps import HeatmapCube, heatmap_paths
+from instrumentation import nbytes, stage
+from passes import add_progressive_pass_column
+
+DATA_DIR = 'data'
+
+# The only event columns the maps read; nothing else is parsed or kept in memory
+EVENT_COLUMNS = ['player_name', 'player_id', 'type_display_name', 'outcome_type_display_name',
+                 'x', 'y', 'end_x', 'end_y', 'period_display_name', 'pass_recipient_name', 'is_touch']
+
+# Memory ceiling for loaded seasons, least recently used seasons are evicted above it
+MAX_MEMORY_BYTES = int(os.environ.get('MU_DASHBOARD_MAX_MEMORY_MB', 2048)) * 1024 * 1024
+
+EVENTS_CSV_RE = re.compile(r'^Manchester United Events (\d{4}-\d{4}) Preprocessed\.csv$')
+
+
+def events_path(season):
+    return os.path.join(DATA_DIR, f'Manchester United Events {season} Preprocessed.csv')
+
+
+# Partition written by Scrape&Preprocess/build_event_store.py
+def event_store_path(season):
+    return os.path.join(DATA_DIR, 'events', f'season={season}')
+
+
+# Prefer the columnar store and fall back to the preprocessed CSV
+def events_source(season):
+    store_path = event_store_path(season)
+    if os.path.isdir(store_path):
+        return store_path
+    return events_path(season)
+
+
+def player_stats_path(season):
+    start, end = season.split('-')
+    return os.path.join(DATA_DIR, f'Manchester United {start} - {end} Player Stats.csv')
+
+
+# Seasons with a preprocessed events CSV or a store partition in the data directory
+def available_seasons():
+    seasons = set()
+    for name in os.listdir(DATA_DIR):
+        match = EVENTS_CSV_RE.match(name)
+        if match:
+            seasons.add(match.group(1))
+    store_dir = os.path.join(DATA_DIR, 'events')
+    if os.path.isdir(store_dir):
+        for name in os.listdir(store_dir):
+            if name.startswith('season='):
+                seasons.add(name[len('season='):])
+    return sorted(seasons)
+
+
+# mtime, size and inode change whenever the file is rewritten or swapped in place.
+# Store partitions are links swapped to a new directory, which changes its inode.
+def file_signature(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+# Everything loaded for a season (events, index, aggregates, heatmaps, ...) is
+# kept for the lifetime of the process. Streamlit re-runs the dashboard script
+# on every interaction but imported modules stay loaded, so a season is loaded
+# on first selection and shared by every session until its files change. When
+# the loaded seasons exceed max_bytes the least recently used ones are dropped.
+class SeasonRegistry:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._seasons = OrderedDict()
+        self._lock = threading.Lock()
+        self._path_locks = {}
+
+    def _path_lock(self, path):
+        with self._lock:
+            return self._path_locks.setdefault(path, threading.RLock())
+
+    def _lookup(self, season, name, signature):
+        with self._lock:
+            entries = self._seasons.get(season)
+            if entries is None:
+                return None
+            self._seasons.move_to_end(season)
+            entry = entries.get(name)
+            if entry is not None and entry[0] == signature:
+                return entry
+
+    def get(self, season, name, path, build):
+        signature = file_signature(path)
+        entry = self._lookup(season, name, signature)
+        if entry is not None:
+            return entry[1]
+
+        # Only one session loads a given file, the others wait and reuse the result
+        with self._path_lock(path):
+            entry = self._lookup(season, name, signature)
+            if entry is not None:
+                return entry[1]
+            value = build(path)
+            with self._lock:
+                self._seasons.setdefault(season, {})[name] = (signature, value, nbytes(value))
+                self._seasons.move_to_end(season)
+                self._evict(keep=season)
+        return value
+
+    def season_bytes(self, season):
+        return sum(entry[2] for entry in self._seasons.get(season, {}).values())
+
+    def total_bytes(self):
+        return sum(self.season_bytes(season) for season in list(self._seasons))
+
+    def _evict(self, keep):
+        while self.total_bytes() > self.max_bytes:
+            oldest = next((season for season in self._seasons if season != keep), None)
+            if oldest is None:
+                break
+            del self._seasons[oldest]
+
+
+registry = SeasonRegistry(MAX_MEMORY_BYTES)
+
+
+def data_version(season):
+    return file_signature(events_source(season))
+
+
+# pyarrow is imported on first read rather than with the module, to keep the
+# dashboard's cold start down to what the first screen needs
+def read_columns(path, columns):
+    if os.path.isdir(path):
+        import pyarrow.parquet as pq
+        with stage('read_store') as current:
+            return current.size(pq.read_table(path, columns=columns, memory_map=True).to_pandas())
+    with stage('read_csv') as current:
+        return current.size(pd.read_csv(path, usecols=columns))
+
+
+def read_events(path):
+    events = read_columns(path, EVENT_COLUMNS)
+    with stage('encode_categoricals') as current:
+        current.size(encode_categoricals(events))
+    with stage('progressive_classification'):
+        return add_progressive_pass_column(events)
+
+
+def load_events(season):
+    return registry.get(season, 'events', events_source(season), read_events)
+
+
+def load_event_index(season):
+    def build(path):
+        events = load_events(season)
+        with stage('build_event_index') as current:
+            return current.size(EventIndex(season, events))
+    return registry.get(season, 'event_index', events_source(season), build)
+
+
+# Read straight from the two name columns of the store or CSV, so the player
+# picker is shown before the season's events are loaded
+def load_player_list(season):
+    def build(path):
+        player_list = read_columns(path, ['player_name', 'player_id'])
+        player_list = player_list.drop_duplicates().dropna().astype({'player_name': str})
+        return player_list.sort_values('player_name').reset_index(drop=True)
+    return registry.get(season, 'player_list', events_source(season), build)
+
+
+# Prebuilt table from aggregates.py if it is newer than the events, else computed once
+def load_aggregates(season):
+    def build(path):
+        prebuilt_path = aggregates_path(season)
+        if os.path.exists(prebuilt_path) and os.stat(prebuilt_path).st_mtime_ns >= os.stat(path).st_mtime_ns:
+            with stage('read_aggregates') as current:
+                return current.size(pd.read_parquet(prebuilt_path))
+        events = load_events(season)
+        with stage('build_aggregates') as current:
+            return current.size(build_player_aggregates(events))
+    return registry.get(season, 'aggregates', events_source(season), build)
+
+
+# Prebuilt cube from heatmaps.py (memory mapped) if it is newer than the events, else binned once
+def load_heatmaps(season):
+    def build(path):
+        counts_path, _ = heatmap_paths(season)
+        if os.path.exists(counts_path) and os.stat(counts_path).st_mtime_ns >= os.stat(path).st_mtime_ns:
+            with stage('read_heatmaps'):
+                return HeatmapCube.load(season)
+        events, player_list = load_events(season), load_player_list(season)
+        with stage('build_heatmaps') as current:
+            return current.size(HeatmapCube.build(events, player_list))
+    return registry.get(season, 'heatmaps', events_source(season), build)
+
+
+# None for seasons without an fbref player stats CSV
+def load_player_stats(season):
+    path = player_stats_path(season)
+    if not os.path.exists(path):
+        return None
+    return registry.get(season, 'player_stats', path, lambda path: pd.read_csv(path, index_col=0))
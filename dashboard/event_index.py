@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+# Low-cardinality text columns, stored as categoricals so each value is held once
+CATEGORICAL_COLUMNS = ['player_name', 'type_display_name', 'outcome_type_display_name',
+                       'period_display_name', 'pass_recipient_name']
+
+_EMPTY = np.array([], dtype=np.intp)
+
+
+def encode_categoricals(events):
+    for column in CATEGORICAL_COLUMNS:
+        if column in events.columns and not isinstance(events[column].dtype, pd.CategoricalDtype):
+            events[column] = events[column].astype('category')
+    return events
+
+
+# Row positions of a season's events grouped by player and by (player, event
+# type), so selecting a player slices their rows directly instead of scanning
+# the whole season table once per filter.
+class EventIndex:
+    def __init__(self, season, events):
+        self.season = season
+        self.events = events
+
+        players = events[['player_name', 'player_id']].dropna().drop_duplicates('player_name')
+        self.player_ids = dict(zip(players['player_name'], players['player_id']))
+
+        self._by_player = events.groupby('player_id', sort=False).indices
+        self._by_player_type = events.groupby(['player_id', 'type_display_name'], observed=True, sort=False).indices
+
+    # Size of the position arrays; the events frame is accounted for by its own cache entry
+    @property
+    def nbytes(self):
+        groups = (self._by_player, self._by_player_type)
+        return sum(positions.nbytes for group in groups for positions in group.values())
+
+    def _take(self, positions):
+        return self.events.iloc[positions].reset_index(drop=True)
+
+    def player_id(self, player_name):
+        return self.player_ids.get(player_name)
+
+    def player_events(self, player_id, type_display_name=None):
+        if type_display_name is None:
+            positions = self._by_player.get(player_id, _EMPTY)
+        else:
+            positions = self._by_player_type.get((player_id, type_display_name), _EMPTY)
+        return self._take(positions)
@@ -0,0 +1,154 @@
+"""Precomputed per-player binned heatmap grids.
+
+Every player's events are binned once per season into a player x layer x
+25 x 25 count cube. A heatmap is then a slice of the cube, a squad or
+multi-player heatmap is a sum over the player axis, and smoothing is applied
+only to the slice being drawn. Build the cubes ahead of time, from the
+repository root, with:
+
+    python dashboard/heatmaps.py 2022-2023 2023-2024
+
+which writes data/heatmaps/<season>.npy (memory mapped when loaded) and a
+<season>.json sidecar with the player and layer order.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from instrumentation import stage
+
+HEATMAPS_DIR = os.path.join('data', 'heatmaps')
+BINS = (25, 25)
+PITCH_EXTENT = (0, 100, 0, 100)  # Opta coordinates: x from 0 to 100, y from 0 to 100
+
+# Layers binned for every player. Touches and the event families use the event
+# start location, received passes use the pass end location.
+TOUCHES = 'Touches'
+RECEIVED_PASSES = 'ReceivedPasses'
+LAYERS = [TOUCHES, RECEIVED_PASSES, 'Pass', 'TakeOn', 'Tackle', 'Interception',
+          'Clearance', 'BallRecovery', 'Aerial']
+
+
+def heatmap_paths(season):
+    return (os.path.join(HEATMAPS_DIR, f'{season}.npy'),
+            os.path.join(HEATMAPS_DIR, f'{season}.json'))
+
+
+# Bin indices laid out like mplsoccer's bin_statistic on the Opta pitch: rows run
+# from the top of the pitch (y=100) down, the last bin on each axis includes its edge
+def _bin_indices(x, y, bins):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    nx, ny = bins
+    x_min, x_max, y_min, y_max = PITCH_EXTENT
+    inside = np.isfinite(x) & np.isfinite(y) & (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+    x_edges = np.linspace(x_min, x_max, nx + 1)
+    y_edges = np.linspace(y_min, y_max, ny + 1)
+    column = np.minimum(np.searchsorted(x_edges, x[inside], side='right') - 1, nx - 1)
+    row = ny - 1 - np.minimum(np.searchsorted(y_edges, y[inside], side='right') - 1, ny - 1)
+    return inside, row, column
+
+
+class HeatmapCube:
+    def __init__(self, counts, player_ids, layers, bins=BINS):
+        self.counts = counts
+        self.player_ids = list(player_ids)
+        self.layers = list(layers)
+        self.bins = tuple(bins)
+        self._player_positions = {player_id: position for position, player_id in enumerate(self.player_ids)}
+
+    # A memory-mapped cube lives in the page cache, not on the heap
+    @property
+    def nbytes(self):
+        if isinstance(self.counts, np.memmap):
+            return 0
+        return self.counts.nbytes
+
+    @classmethod
+    def build(cls, events, player_list, layers=LAYERS, bins=BINS):
+        player_ids = list(player_list['player_id'])
+        player_codes = {player_id: code for code, player_id in enumerate(player_ids)}
+        name_codes = {name: player_codes[player_id]
+                      for name, player_id in zip(player_list['player_name'], player_list['player_id'])}
+        nx, ny = bins
+
+        codes, rows, columns = [], [], []
+        for layer_code, layer in enumerate(layers):
+            if layer == RECEIVED_PASSES:
+                player_code = events['pass_recipient_name'].astype(object).map(name_codes)
+                x, y = events['end_x'], events['end_y']
+            else:
+                player_code = events['player_id'].map(player_codes)
+                if layer == TOUCHES:
+                    selected = events['is_touch'].fillna(False).astype(bool)
+                else:
+                    selected = events['type_display_name'] == layer
+                player_code = player_code.where(selected)
+                x, y = events['x'], events['y']
+
+            player_code = player_code.to_numpy(dtype=float)
+            has_player = ~np.isnan(player_code)
+            inside, row, column = _bin_indices(x.to_numpy(dtype=float)[has_player],
+                                               y.to_numpy(dtype=float)[has_player], bins)
+            codes.append(player_code[has_player][inside].astype(np.intp) * len(layers) + layer_code)
+            rows.append(row)
+            columns.append(column)
+
+        # One bincount over every (player, layer, row, column) cell
+        flat = (np.concatenate(codes) * ny + np.concatenate(rows)) * nx + np.concatenate(columns)
+        counts = np.bincount(flat, minlength=len(player_ids) * len(layers) * ny * nx)
+        counts = counts.astype(np.int32).reshape(len(player_ids), len(layers), ny, nx)
+        return cls(counts, player_ids, layers, bins)
+
+    def save(self, season):
+        counts_path, meta_path = heatmap_paths(season)
+        os.makedirs(os.path.dirname(counts_path), exist_ok=True)
+        np.save(counts_path, self.counts)
+        with open(meta_path, 'w') as f:
+            json.dump({'player_ids': [float(player_id) for player_id in self.player_ids],
+                       'layers': self.layers, 'bins': self.bins}, f)
+
+    @classmethod
+    def load(cls, season):
+        counts_path, meta_path = heatmap_paths(season)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        counts = np.load(counts_path, mmap_mode='r')
+        return cls(counts, meta['player_ids'], meta['layers'], meta['bins'])
+
+    # Summed counts for one player id or a list of them; empty for unknown players
+    def grid(self, player_ids, layer, sigma=None):
+        if not isinstance(player_ids, (list, tuple, np.ndarray)):
+            player_ids = [player_ids]
+        positions = [self._player_positions[player_id] for player_id in player_ids
+                     if player_id in self._player_positions]
+        layer_position = self.layers.index(layer)
+        grid = self.counts[positions, layer_position].sum(axis=0, dtype=float)
+        if sigma:
+            # scipy is only needed once a smoothed map is drawn, not at dashboard start-up
+            from scipy.ndimage import gaussian_filter
+            with stage('gaussian_filter'):
+                grid = gaussian_filter(grid, sigma)
+        return grid
+
+    def squad_grid(self, layer, sigma=None):
+        return self.grid(self.player_ids, layer, sigma)
+
+
+def main():
+    from data_loader import load_events, load_player_list
+
+    parser = argparse.ArgumentParser(description='Build the per-player heatmap cube for each season.')
+    parser.add_argument('seasons', nargs='+', help='seasons to build, e.g. 2023-2024')
+    args = parser.parse_args()
+
+    for season in args.seasons:
+        cube = HeatmapCube.build(load_events(season), load_player_list(season))
+        cube.save(season)
+        print(f'{season}: {cube.counts.shape} -> {heatmap_paths(season)[0]}')
+
+
+if __name__ == '__main__':
+    main()
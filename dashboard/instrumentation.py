@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Opt-in stage timings. With MU_DASHBOARD_PROFILE set, every dashboard rerun
+# records how long each stage took and how large its result is, and shows them
+# in a sidebar panel. MU_DASHBOARD_PROFILE_LOG additionally writes them to a
+# local file: Prometheus text (rewritten after each rerun, for a node exporter
+# textfile collector) if the path ends in .prom, JSON lines otherwise.
+ENABLED = bool(os.environ.get('MU_DASHBOARD_PROFILE'))
+LOG_PATH = os.environ.get('MU_DASHBOARD_PROFILE_LOG')
+
+# Upper bounds of the Prometheus latency histogram buckets, in seconds
+BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+# Streamlit runs each session's reruns in its own thread, so the current run's
+# records are kept per thread and stages deep in the loaders land in the right run
+_local = threading.local()
+
+
+def nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return getattr(value, 'nbytes', 0)
+
+
+class Stage:
+    def __init__(self, recording):
+        self.recording = recording
+        self.bytes = None
+
+    # Size of the stage's result; only measured while recording
+    def size(self, value):
+        if self.recording:
+            self.bytes = nbytes(value)
+        return value
+
+
+def start_run():
+    _local.records = [] if ENABLED else None
+    _local.started = time.perf_counter()
+
+
+# The run's records, ending with the whole rerun's wall time
+def finish_run():
+    run_records = getattr(_local, 'records', None)
+    if run_records is None:
+        return []
+    run_records.append({'stage': 'rerun', 'seconds': time.perf_counter() - _local.started, 'bytes': None})
+    _local.records = None
+    return run_records
+
+
+@contextmanager
+def stage(name):
+    run_records = getattr(_local, 'records', None)
+    current = Stage(run_records is not None)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        if run_records is not None:
+            run_records.append({'stage': name, 'seconds': time.perf_counter() - start, 'bytes': current.bytes})
+
+
+def record(name, seconds, size=None):
+    run_records = getattr(_local, 'records', None)
+    if run_records is not None:
+        run_records.append({'stage': name, 'seconds': seconds, 'bytes': size})
+
+
+# Totals across every rerun in this process, for the Prometheus file
+_totals = {}
+_totals_lock = threading.Lock()
+
+
+def export(run_records, **labels):
+    if not LOG_PATH or not run_records:
+        return
+    if LOG_PATH.endswith('.prom'):
+        _export_prometheus(run_records)
+    else:
+        line = json.dumps({'time': time.time(), **labels, 'stages': run_records})
+        with _totals_lock, open(LOG_PATH, 'a') as f:
+            f.write(line + '\n')
+
+
+def _export_prometheus(run_records):
+    with _totals_lock:
+        for run_record in run_records:
+            totals = _totals.setdefault(run_record['stage'], {'count': 0, 'sum': 0.0, 'buckets': [0] * len(BUCKETS),
+                                                              'bytes': None})
+            totals['count'] += 1
+            totals['sum'] += run_record['seconds']
+            for position, bound in enumerate(BUCKETS):
+                if run_record['seconds'] <= bound:
+                    totals['buckets'][position] += 1
+            if run_record['bytes'] is not None:
+                totals['bytes'] = run_record['bytes']
+
+        lines = ['# HELP mu_dashboard_stage_seconds Wall time of a dashboard stage.',
+                 '# TYPE mu_dashboard_stage_seconds histogram']
+        for name, totals in sorted(_totals.items()):
+            for bound, count in zip(BUCKETS, totals['buckets']):
+                lines.append(f'mu_dashboard_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'mu_dashboard_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {totals["count"]}')
+            lines.append(f'mu_dashboard_stage_seconds_sum{{stage="{name}"}} {totals["sum"]}')
+            lines.append(f'mu_dashboard_stage_seconds_count{{stage="{name}"}} {totals["count"]}')
+        lines += ['# HELP mu_dashboard_stage_bytes Size of the last result of a dashboard stage.',
+                  '# TYPE mu_dashboard_stage_bytes gauge']
+        for name, totals in sorted(_totals.items()):
+            if totals['bytes'] is not None:
+                lines.append(f'mu_dashboard_stage_bytes{{stage="{name}"}} {totals["bytes"]}')
+
+        # Replaced in one step so a collector never reads a half-written file
+        tmp_path = LOG_PATH + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, LOG_PATH)
@@ -0,0 +1,171 @@
+from heatmaps import RECEIVED_PASSES
+
+GREEN = '#2eb774'
+RED = '#ba4f45'
+BLUE = '#77c3ec'
+
+SUCCESSFUL = {'outcome_type_display_name': 'Successful'}
+UNSUCCESSFUL = {'outcome_type_display_name': 'Unsuccessful'}
+
+# Each map described as data and drawn by maps.render_map, in the order the
+# dashboard shows them:
+#   source   events the map draws from. None means all of the player's events,
+#            RECEIVED_PASSES their smoothed received-pass heatmap grid, anything
+#            else their events of that type_display_name
+#   filter   optional named row filter from maps.EVENT_FILTERS
+#   layers   drawn in order; 'where' selects the rows of a layer by column value,
+#            sizes and widths are scaled by maps.scaling_factor
+#   legend   legend location, None for no legend
+#   legend_handlelength  optional legend marker length, 1 by default
+#   total    header count: label and the aggregates columns it sums
+#   rate     optional header rate: label and aggregates column. Maps with a rate
+#            get the taller header with the per-layer counts below it
+#   counts   per-layer counts: x position, label, aggregates column and colour
+#   pitch    optional pitch line colour and colorbar for heatmaps
+# Kept apart from maps.py so the dashboard can select data without importing
+# mplsoccer and Matplotlib until a map is actually drawn.
+MAP_SPECS = {
+    'shot': {
+        'title': 'Shot Map',
+        'source': None,
+        'filter': 'shot_zone',
+        'layers': [
+            {'kind': 'scatter', 'where': {'type_display_name': 'SavedShot'}, 'size': 70, 'color': BLUE, 'label': 'Saved'},
+            {'kind': 'scatter', 'where': {'type_display_name': 'MissedShots'}, 'size': 50, 'color': RED, 'label': 'Missed'},
+            {'kind': 'scatter', 'where': {'type_display_name': 'Goal'}, 'size': 100, 'color': GREEN, 'label': 'Goals'},
+        ],
+        'legend': 'upper left',
+        'total': ('{} Total Shots', ['shots']),
+        'rate': ('{}% Conversion Rate', 'shot_conversion_rate'),
+        'counts': [(0.37, '{} Goals', 'goals', GREEN),
+                   (0.46, '{} Saved', 'saved_shots', BLUE),
+                   (0.55, '{} Missed', 'missed_shots', RED)],
+    },
+    'take_on': {
+        'title': 'Take On Map',
+        'source': 'TakeOn',
+        'layers': [
+            {'kind': 'scatter', 'where': UNSUCCESSFUL, 'size': 50, 'color': RED, 'label': 'Unsuccessful'},
+            {'kind': 'scatter', 'where': SUCCESSFUL, 'size': 100, 'color': GREEN, 'label': 'Successful'},
+        ],
+        'legend': 'upper left',
+        'total': ('{} Total Take On', ['take_ons_successful', 'take_ons_unsuccessful']),
+        'rate': ('{}% Success Rate', 'take_on_success_rate'),
+        'counts': [(0.38, '{} Successful', 'take_ons_successful', GREEN),
+                   (0.5, '{} Unsuccessful', 'take_ons_unsuccessful', RED)],
+    },
+    'receive_pass': {
+        'title': 'Receive Pass Heatmap',
+        'source': RECEIVED_PASSES,
+        'layers': [{'kind': 'heatmap', 'cmap': 'hot'}],
+        'legend': None,
+        'total': ('{} Passes Received', ['passes_received']),
+        'pitch': {'line_color': '#efefef', 'colorbar': True},
+    },
+    'pass': {
+        'title': 'Pass Map',
+        'source': 'Pass',
+        'layers': [
+            {'kind': 'arrows', 'where': SUCCESSFUL, 'width': 1.5, 'color': GREEN, 'label': 'Completed Pass'},
+            {'kind': 'arrows', 'where': UNSUCCESSFUL, 'width': 1, 'headaxislength': 10, 'color': RED, 'label': 'Failed Pass'},
+        ],
+        'legend': 'upper left',
+        'total': ('{} Total Passes', ['passes_successful', 'passes_unsuccessful']),
+        'rate': ('{}% Completion Rate', 'pass_completion_rate'),
+        'counts': [(0.385, '{} Completed', 'passes_successful', GREEN),
+                   (0.525, '{} Failed', 'passes_unsuccessful', RED)],
+    },
+    'progressive_pass': {
+        'title': 'Progressive Pass Map',
+        'source': 'Pass',
+        'filter': 'progressive',
+        'layers': [
+            {'kind': 'arrows', 'where': SUCCESSFUL, 'width': 1.5, 'color': GREEN, 'label': 'Completed Pass'},
+            {'kind': 'arrows', 'where': UNSUCCESSFUL, 'width': 1, 'headaxislength': 10, 'color': RED, 'label': 'Failed Pass'},
+        ],
+        'legend': 'upper left',
+        'total': ('{} Progressive Passes', ['progressive_passes_successful', 'progressive_passes_unsuccessful']),
+        'rate': ('{}% Completion Rate', 'progressive_pass_completion_rate'),
+        'counts': [(0.385, '{} Completed', 'progressive_passes_successful', GREEN),
+                   (0.52, '{} Failed', 'progressive_passes_unsuccessful', RED)],
+    },
+    'forward_pass': {
+        'title': 'Forward Pass Map',
+        'source': 'Pass',
+        'filter': 'forward',
+        'layers': [
+            {'kind': 'arrows', 'where': SUCCESSFUL, 'width': 1.5, 'color': GREEN, 'label': 'Completed Pass'},
+            {'kind': 'arrows', 'where': UNSUCCESSFUL, 'width': 1, 'headaxislength': 10, 'color': RED, 'label': 'Failed Pass'},
+        ],
+        'legend': 'upper left',
+        'legend_handlelength': 0.5,
+        'total': ('{} Forward Passes', ['forward_passes_successful', 'forward_passes_unsuccessful']),
+        'rate': ('{}% Completion Rate', 'forward_pass_completion_rate'),
+        'counts': [(0.385, '{} Completed', 'forward_passes_successful', GREEN),
+                   (0.52, '{} Failed', 'forward_passes_unsuccessful', RED)],
+    },
+    'aerial': {
+        'title': 'Aerial Duel Map',
+        'source': 'Aerial',
+        'layers': [
+            {'kind': 'scatter', 'where': UNSUCCESSFUL, 'size': 50, 'color': RED, 'label': 'Unsuccessful Aerial Duel'},
+            {'kind': 'scatter', 'where': SUCCESSFUL, 'size': 100, 'color': GREEN, 'label': 'Successful Aerial Duel'},
+        ],
+        'legend': 'upper left',
+        'total': ('{} Total Aerial Duels', ['aerials_successful', 'aerials_unsuccessful']),
+        'rate': ('{}% Success Rate', 'aerial_success_rate'),
+        'counts': [(0.38, '{} Successful', 'aerials_successful', GREEN),
+                   (0.5, '{} Unsuccessful', 'aerials_unsuccessful', RED)],
+    },
+    'clearance': {
+        'title': 'Clearance Map',
+        'source': 'Clearance',
+        'layers': [{'kind': 'scatter', 'where': SUCCESSFUL, 'size': 100, 'marker': 'D', 'color': GREEN, 'label': 'Clearance'}],
+        'legend': 'upper right',
+        'total': ('{} Total Clearances', ['clearances']),
+    },
+    'recovery': {
+        'title': 'Ball Recovery Map',
+        'source': 'BallRecovery',
+        'layers': [{'kind': 'scatter', 'where': SUCCESSFUL, 'size': 140, 'marker': 'X', 'color': GREEN, 'label': 'Ball Recovery'}],
+        'legend': 'upper right',
+        'total': ('{} Total Ball Recoveries', ['recoveries']),
+    },
+    'interception': {
+        'title': 'Interception Map',
+        'source': 'Interception',
+        'layers': [{'kind': 'scatter', 'where': SUCCESSFUL, 'size': 100, 'color': GREEN, 'label': 'Interception'}],
+        'legend': 'upper right',
+        'total': ('{} Total Interceptions', ['interceptions']),
+    },
+    'tackle': {
+        'title': 'Tackle Map',
+        'source': 'Tackle',
+        'layers': [
+            {'kind': 'scatter', 'where': UNSUCCESSFUL, 'size': 80, 'marker': 'X', 'color': RED, 'label': 'Unsuccessful'},
+            {'kind': 'scatter', 'where': SUCCESSFUL, 'size': 140, 'marker': 'X', 'color': GREEN, 'label': 'Successful'},
+        ],
+        'legend': 'upper left',
+        'total': ('{} Total Tackle', ['tackles_successful', 'tackles_unsuccessful']),
+        'rate': ('{}% Success Rate', 'tackle_success_rate'),
+        'counts': [(0.38, '{} Successful', 'tackles_successful', GREEN),
+                   (0.5, '{} Unsuccessful', 'tackles_unsuccessful', RED)],
+    },
+}
+
+
+# Map types drawn together when a group is selected on the dashboard
+MAP_GROUPS = {
+    'Attacking': ['shot', 'take_on'],
+    'Passing': ['receive_pass', 'pass', 'progressive_pass', 'forward_pass'],
+    'Defending': ['aerial', 'clearance', 'recovery', 'interception', 'tackle'],
+}
+
+
+# load_heatmaps returns the season's heatmap cube; it is only called for maps
+# drawn from the cube, so the others never load or bin it
+def map_events(event_index, load_heatmaps, map_type, player_id):
+    source = MAP_SPECS[map_type]['source']
+    if source == RECEIVED_PASSES:
+        return load_heatmaps().grid(player_id, RECEIVED_PASSES, sigma=1)
+    return event_index.player_events(player_id, source)
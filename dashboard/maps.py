@@ -0,0 +1,186 @@
+import io
+
+from matplotlib import image as mpimg
+from matplotlib.cm import ScalarMappable
+from mplsoccer import Pitch
+
+from map_specs import MAP_SPECS
+
+# render_map draws a map from its spec in map_specs.py: the player's events for
+# that map (or heatmap grid) and their row of the season aggregates table
+# (counts and rates for the header text) go in, the encoded image comes out.
+
+scaling_factor = 0.5
+FIGSIZE = (6, 4)
+DPI = 200
+PAD_INCHES = 0.1
+PITCH_COLOR = '#22312b'
+LINE_COLOR = '#c7d5cc'
+LINE_ZORDER = 2
+
+# Row filters applied to a map's events before its layers select from them
+EVENT_FILTERS = {
+    'shot_zone': lambda events: (events['period_display_name'] != 'PenaltyShootout') & (events.x >= 50.0),
+    'progressive': lambda events: events['is_progressive'].astype(bool),
+    'forward': lambda events: events.end_x > events.x + 1,
+}
+
+
+# A pitch drawn once per style and header height, with the footer. The figure
+# is sized to the map's tight bounding box up front, so a map is the cached
+# pitch pixels plus the data layers and header drawn on top, instead of a new
+# Pitch, a full draw and a second tight-bbox draw per image. Not thread safe:
+# maps are drawn one at a time per process (see render_pool.py).
+class PitchBackground:
+    def __init__(self, spec):
+        style = spec.get('pitch', {})
+        self.pitch = Pitch(pitch_type='opta', half=False, line_zorder=LINE_ZORDER, pitch_color=PITCH_COLOR,
+                           line_color=style.get('line_color', LINE_COLOR))
+        self.fig, self.ax = self.pitch.draw(figsize=FIGSIZE)
+        self.fig.set_dpi(DPI)
+        self.fig.set_facecolor(PITCH_COLOR)
+
+        self.colorbar = None
+        footer_right = .99
+        if style.get('colorbar'):
+            self.colorbar = self.fig.colorbar(ScalarMappable(cmap='hot'), ax=self.ax, shrink=0.6)
+            self.colorbar.outline.set_edgecolor('#efefef')
+            self.colorbar.ax.yaxis.set_tick_params(color='#efefef', labelcolor='#efefef')
+            footer_right = 1.1
+
+        self.ax.text(-.01, -.02, 'Data: Opta', ha='left', va='bottom', transform=self.ax.transAxes, fontdict={'size':12*scaling_factor, 'color':'white'})
+        self.ax.text(footer_right, -.02, 'Twitter:@patrickcw_', ha='right', va='bottom', transform=self.ax.transAxes, fontdict={'size':12*scaling_factor, 'color':'white'})
+
+        self._fit_to_header(spec)
+
+        # Pitch lines are redrawn over data layers that sit below them, like the heatmap
+        self.markings = [artist for artist in self.ax.lines + self.ax.patches if artist.get_zorder() >= LINE_ZORDER]
+        if self.colorbar is not None:
+            self.colorbar.ax.set_visible(False)
+        self.fig.canvas.draw()
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+
+    # Same crop savefig(bbox_inches='tight') would give, with a placeholder header
+    # of the same height, applied once by resizing the figure around the axes
+    def _fit_to_header(self, spec):
+        header = draw_header(self.ax, spec, 'Player', 'Season', _ZeroStats())
+        self.fig.canvas.draw()
+        # mplsoccer's tight layout has placed the axes around the header; keep that
+        # layout fixed from here on so the cached pixels stay valid
+        self.fig.set_layout_engine('none')
+        bbox = self.fig.get_tightbbox(self.fig.canvas.get_renderer()).padded(PAD_INCHES)
+        for artist in header[1:]:
+            artist.remove()
+        self.ax.set_title('')
+
+        fig_width, fig_height = self.fig.get_size_inches()
+        for ax in self.fig.axes:
+            x0, y0, x1, y1 = ax.get_position().extents
+            ax.set_position([(x0 * fig_width - bbox.x0) / bbox.width, (y0 * fig_height - bbox.y0) / bbox.height,
+                             (x1 - x0) * fig_width / bbox.width, (y1 - y0) * fig_height / bbox.height])
+        self.fig.set_size_inches(bbox.width, bbox.height)
+
+    def render(self, spec, events, playerName, season, stats, format='png'):
+        artists = draw_layers(self.pitch, self.ax, spec, events)
+        layers = list(artists)
+        if any(artist.get_zorder() < LINE_ZORDER for artist in layers):
+            artists += self.markings
+        artists.sort(key=lambda artist: artist.get_zorder())
+
+        if self.colorbar is not None:
+            self.colorbar.update_normal(layers[0])  # the heatmap layer
+            self.colorbar.ax.set_visible(True)
+            artists.append(self.colorbar.ax)
+        if spec['legend']:
+            legend = self.ax.legend(facecolor='white', handlelength=spec.get('legend_handlelength', 1), edgecolor='None', fontsize=12*scaling_factor, loc=spec['legend'])
+            artists.append(legend)
+            layers.append(legend)
+        header = draw_header(self.ax, spec, playerName, season, stats)
+        artists += header
+
+        try:
+            if format == 'png':
+                canvas = self.fig.canvas
+                canvas.restore_region(self.background)
+                for artist in artists:
+                    self.fig.draw_artist(artist)
+                buffer = io.BytesIO()
+                mpimg.imsave(buffer, canvas.buffer_rgba(), format='png', dpi=DPI)
+            else:
+                # Vector output is drawn in full; the figure is already cropped
+                buffer = io.BytesIO()
+                self.fig.savefig(buffer, format=format, dpi=DPI, facecolor=PITCH_COLOR)
+            return buffer.getvalue()
+        finally:
+            for artist in layers + header[1:]:
+                artist.remove()
+            self.ax.set_title('')
+            if self.colorbar is not None:
+                self.colorbar.ax.set_visible(False)
+
+
+# Header stats for sizing a background before any player is drawn
+class _ZeroStats(dict):
+    def __missing__(self, key):
+        return 0
+
+
+def draw_layers(pitch, ax, spec, events):
+    if spec.get('filter'):
+        events = events.loc[EVENT_FILTERS[spec['filter']](events)]
+
+    artists = []
+    for layer in spec['layers']:
+        if layer['kind'] == 'heatmap':
+            # The smoothed counts come precomputed from the season heatmap cube
+            bin_statistic = pitch.bin_statistic([], [], statistic='count', bins=events.shape)
+            bin_statistic['statistic'] = events
+            artists.append(pitch.heatmap(bin_statistic, ax=ax, cmap=layer['cmap'], edgecolors=PITCH_COLOR))
+            continue
+
+        selected = events
+        for column, value in layer.get('where', {}).items():
+            selected = selected.loc[selected[column] == value]
+        if layer['kind'] == 'scatter':
+            artists.append(pitch.scatter(selected.x, selected.y, s=layer['size']*scaling_factor, marker=layer.get('marker', 'o'),
+                                         c=layer['color'], zorder=3, ax=ax, edgecolors='black', label=layer['label']))
+        elif layer['kind'] == 'arrows':
+            options = {}
+            if 'headaxislength' in layer:
+                options['headaxislength'] = layer['headaxislength']*scaling_factor
+            artists.append(pitch.arrows(selected.x, selected.y, selected.end_x, selected.end_y, width=layer['width']*scaling_factor,
+                                        headwidth=3, headlength=3, color=layer['color'], ax=ax, label=layer['label'], **options))
+    return artists
+
+
+# Title, total, and for maps with a rate the rate and per-layer counts below it
+def draw_header(ax, spec, playerName, season, stats):
+    detailed = 'rate' in spec
+    pad = 50 if detailed else 20
+    header = [ax.set_title(f'{playerName} {spec["title"]} {season}', fontsize=20*scaling_factor, color='white', pad=pad*scaling_factor)]
+
+    total_label, total_columns = spec['total']
+    total = sum(stats[column] for column in total_columns)
+    header.append(ax.text(0.5, 1.08 if detailed else 1, total_label.format(total), ha='center', va='center', transform=ax.transAxes, fontsize=14*scaling_factor, color='white'))
+    if detailed:
+        rate_label, rate_column = spec['rate']
+        header.append(ax.text(0.5, 1.04, rate_label.format(stats[rate_column]), ha='center', va='center', transform=ax.transAxes, fontsize=10*scaling_factor, color='white'))
+        for x, label, column, color in spec['counts']:
+            header.append(ax.text(x, 1, label.format(stats[column]), ha='left', va='center', transform=ax.transAxes, fontsize=10*scaling_factor, color=color))
+    return header
+
+
+_backgrounds = {}
+
+
+def _background(spec):
+    style = spec.get('pitch', {})
+    key = (style.get('line_color', LINE_COLOR), bool(style.get('colorbar')), 'rate' in spec)
+    if key not in _backgrounds:
+        _backgrounds[key] = PitchBackground(spec)
+    return _backgrounds[key]
+
+
+def render_map(map_type, events, playerName, season, stats, format='png'):
+    spec = MAP_SPECS[map_type]
+    return _background(spec).render(spec, events, playerName, season, stats, format=format)
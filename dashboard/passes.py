@@ -0,0 +1,48 @@
+import numpy as np
+
+PITCH_LENGTH = 100  # Length of the pitch in meters
+GOAL_WIDTH = 7.32  # Standard goal width in meters
+ATTACKING_TWO_THIRDS_START = PITCH_LENGTH / 3  # 33.33 meters from the goal
+GOAL_Y_MIN = 50 - GOAL_WIDTH / 2
+GOAL_Y_MAX = 50 + GOAL_WIDTH / 2
+
+
+# Progressive passes aim to capture this and are defined as “completed open-play passes in the attacking two-thirds of the pitch that move the ball at least 25% closer to the goal
+def is_progressive_pass(row):
+    # Closest y position on the goal line
+    closest_y_on_goal = min(max(row['y'], GOAL_Y_MIN), GOAL_Y_MAX)
+    closest_y_on_goal_end = min(max(row['end_y'], GOAL_Y_MIN), GOAL_Y_MAX)
+
+    # Calculate initial and final distances to the closest point on the goal line
+    initial_distance_to_goal = ((PITCH_LENGTH - row['x'])**2 + (closest_y_on_goal - row['y'])**2)**0.5
+    final_distance_to_goal = ((PITCH_LENGTH - row['end_x'])**2 + (closest_y_on_goal_end - row['end_y'])**2)**0.5
+
+    return (row['x'] > ATTACKING_TWO_THIRDS_START and
+            row['end_x'] > row['x'] and
+            final_distance_to_goal <= initial_distance_to_goal * 0.75)
+
+
+# Same definition as is_progressive_pass, evaluated over whole coordinate arrays at once
+def progressive_pass_mask(x, y, end_x, end_y):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    end_x = np.asarray(end_x, dtype=float)
+    end_y = np.asarray(end_y, dtype=float)
+
+    closest_y_on_goal = np.clip(y, GOAL_Y_MIN, GOAL_Y_MAX)
+    closest_y_on_goal_end = np.clip(end_y, GOAL_Y_MIN, GOAL_Y_MAX)
+
+    initial_distance_to_goal = ((PITCH_LENGTH - x)**2 + (closest_y_on_goal - y)**2)**0.5
+    final_distance_to_goal = ((PITCH_LENGTH - end_x)**2 + (closest_y_on_goal_end - end_y)**2)**0.5
+
+    return ((x > ATTACKING_TWO_THIRDS_START) &
+            (end_x > x) &
+            (final_distance_to_goal <= initial_distance_to_goal * 0.75))
+
+
+# Stores the classification once per season so the maps only have to filter on it
+def add_progressive_pass_column(events):
+    is_pass = (events['type_display_name'] == 'Pass').to_numpy()
+    mask = progressive_pass_mask(events['x'], events['y'], events['end_x'], events['end_y'])
+    events['is_progressive'] = is_pass & mask
+    return events
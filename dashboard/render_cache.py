@@ -0,0 +1,33 @@
+import threading
+from collections import OrderedDict
+
+
+# Finished map images keyed by (season, player_id, map_type, data_version).
+# Least recently used images are evicted once the cached bytes exceed max_bytes.
+class RenderCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def put(self, key, image):
+        # An image larger than the whole budget would only evict everything else
+        if len(image) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._images.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous)
+            self._images[key] = image
+            self.total_bytes += len(image)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self.total_bytes -= len(evicted)
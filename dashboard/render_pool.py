@@ -0,0 +1,26 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Processes drawing maps for the dashboard, one per core by default
+RENDER_WORKERS = int(os.environ.get('MU_DASHBOARD_RENDER_WORKERS', os.cpu_count() or 1))
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+# Runs in a worker: draws one map and returns the encoded image. mplsoccer and
+# Matplotlib are imported once per worker, on its first map.
+def render_image(map_type, events, player_name, season, stats, format='png'):
+    from maps import render_map
+    return render_map(map_type, events, player_name, season, stats, format=format)
+
+
+# Workers are forked: Streamlit runs the dashboard script as __main__, so spawned
+# workers would re-run the whole page on start-up. They use the Agg backend since
+# they never open a window.
+def render_pool(workers=RENDER_WORKERS):
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'),
+                               initializer=_init_worker)
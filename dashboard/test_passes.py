@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from passes import ATTACKING_TWO_THIRDS_START, GOAL_Y_MAX, GOAL_Y_MIN, is_progressive_pass, progressive_pass_mask
+
+
+def random_passes(n=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    passes = pd.DataFrame({'x': rng.uniform(0, 100, n), 'y': rng.uniform(0, 100, n),
+                           'end_x': rng.uniform(0, 100, n), 'end_y': rng.uniform(0, 100, n)})
+    # Missing coordinates, as on events without an end point
+    passes.loc[rng.random(n) < 0.05, 'y'] = np.nan
+    passes.loc[rng.random(n) < 0.05, 'end_x'] = np.nan
+    # Passes that start or end inside the goal mouth, where the y clipping has no effect
+    in_goal = rng.random(n) < 0.2
+    passes.loc[in_goal, 'y'] = rng.uniform(GOAL_Y_MIN, GOAL_Y_MAX, in_goal.sum())
+    passes.loc[rng.random(n) < 0.2, 'end_y'] = GOAL_Y_MAX
+    # Passes starting exactly on the attacking two-thirds line
+    passes.loc[rng.random(n) < 0.02, 'x'] = ATTACKING_TWO_THIRDS_START
+    return passes
+
+
+def test_mask_matches_row_wise_definition():
+    passes = random_passes()
+    expected = passes.apply(is_progressive_pass, axis=1).to_numpy(dtype=bool)
+    mask = progressive_pass_mask(passes['x'], passes['y'], passes['end_x'], passes['end_y'])
+    assert mask.dtype == bool
+    np.testing.assert_array_equal(mask, expected)
+
+
+def test_two_thirds_line_is_not_progressive():
+    x = ATTACKING_TWO_THIRDS_START
+    passes = pd.DataFrame({'x': [x, x + 1e-9], 'y': [50, 50], 'end_x': [99, 99], 'end_y': [50, 50]})
+    expected = passes.apply(is_progressive_pass, axis=1).to_numpy(dtype=bool)
+    mask = progressive_pass_mask(passes['x'], passes['y'], passes['end_x'], passes['end_y'])
+    np.testing.assert_array_equal(mask, expected)
+    assert list(mask) == [False, True]